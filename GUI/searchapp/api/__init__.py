@@ -1,20 +1,66 @@
 # 06-06-2025 By @FrancescoGrazioso -> "https://github.com/FrancescoGrazioso"
 
 
-from typing import Dict, Type
+import importlib
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Tuple, Type, Union
 
 
 # Internal utilities
 from .base import BaseStreamingAPI
-from .streamingcommunity import StreamingCommunityAPI
-from .animeunity import AnimeUnityAPI
 
+if TYPE_CHECKING:
+    from .streamingcommunity import StreamingCommunityAPI
+    from .animeunity import AnimeUnityAPI
 
-_API_REGISTRY: Dict[str, Type[BaseStreamingAPI]] = {
-    'streamingcommunity': StreamingCommunityAPI,
-    'animeunity': AnimeUnityAPI,
+
+# Site key -> (module, class name), resolved on first use
+_API_REGISTRY: Dict[str, Union[Tuple[str, str], Type[BaseStreamingAPI]]] = {
+    'streamingcommunity': ('.streamingcommunity', 'StreamingCommunityAPI'),
+    'animeunity': ('.animeunity', 'AnimeUnityAPI'),
 }
 
+# Bumped by register_api() so callers can key caches derived from the registry
+_registry_version = 0
+
+# Class name -> module, used by the module-level __getattr__
+_LAZY_CLASSES: Dict[str, str] = {
+    class_name: module_name
+    for module_name, class_name in _API_REGISTRY.values()
+}
+
+
+def _import_api_class(module_name: str, class_name: str) -> Type[BaseStreamingAPI]:
+    """Import an API class and cache it in the module namespace."""
+    module = importlib.import_module(module_name, __package__)
+    api_class = getattr(module, class_name)
+    globals()[class_name] = api_class
+    return api_class
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_CLASSES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    return _import_api_class(module_name, name)
+
+
+def _resolve_api_class(site_key: str) -> Type[BaseStreamingAPI]:
+    """Return the API class registered for site_key, importing it if needed."""
+    entry = _API_REGISTRY[site_key]
+    if isinstance(entry, tuple):
+        entry = _import_api_class(*entry)
+        _API_REGISTRY[site_key] = entry
+
+    return entry
+
+
+@lru_cache(maxsize=None)
+def _build_api(site_key: str) -> BaseStreamingAPI:
+    """Instantiate the API for site_key once per process."""
+    return _resolve_api_class(site_key)()
+
 
 def get_api(site_name: str) -> BaseStreamingAPI:
     """
@@ -24,9 +70,9 @@ def get_api(site_name: str) -> BaseStreamingAPI:
         site_name: Name of the streaming site
         
     Returns:
-        Instance of the appropriate API class
+        Shared instance of the appropriate API class
     """
-    site_key = site_name.lower().split('_')[0]
+    site_key = site_name.lower().partition('_')[0]
     
     if site_key not in _API_REGISTRY:
         raise ValueError(
@@ -34,8 +80,7 @@ def get_api(site_name: str) -> BaseStreamingAPI:
             f"Available sites: {', '.join(_API_REGISTRY.keys())}"
         )
     
-    api_class = _API_REGISTRY[site_key]
-    return api_class()
+    return _build_api(site_key)
 
 
 def get_available_sites() -> list:
@@ -48,6 +93,16 @@ def get_available_sites() -> list:
     return list(_API_REGISTRY.keys())
 
 
+def get_registry_version() -> int:
+    """
+    Get a counter that changes whenever a site is registered.
+    
+    Returns:
+        Current registry version
+    """
+    return _registry_version
+
+
 def register_api(site_name: str, api_class: Type[BaseStreamingAPI]):
     """
     Register a new API class.
@@ -59,14 +114,18 @@ def register_api(site_name: str, api_class: Type[BaseStreamingAPI]):
     if not issubclass(api_class, BaseStreamingAPI):
         raise ValueError(f"{api_class} must inherit from BaseStreamingAPI")
     
+    global _registry_version
     _API_REGISTRY[site_name.lower()] = api_class
+    _registry_version += 1
+    _build_api.cache_clear()
 
 
 __all__ = [
     'BaseStreamingAPI',
-    'StreamingCommunityAPI', 
+    'StreamingCommunityAPI',
     'AnimeUnityAPI',
     'get_api',
     'get_available_sites',
+    'get_registry_version',
     'register_api'
 ]
\ No newline at end of file
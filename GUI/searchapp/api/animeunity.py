@@ -1,6 +1,7 @@
 # 06-06-2025 By @FrancescoGrazioso -> "https://github.com/FrancescoGrazioso"
 
 
+import sys
 import importlib
 from typing import List, Optional
 
@@ -9,11 +10,6 @@ from typing import List, Optional
 from .base import BaseStreamingAPI, MediaItem, Season, Episode
 
 
-# External utilities
-from StreamingCommunity.Util.config_json import config_manager
-from StreamingCommunity.Api.Site.animeunity.util.ScrapeSerie import ScrapeSerieAnime
-
-
 
 class AnimeUnityAPI(BaseStreamingAPI):
     def __init__(self):
@@ -24,13 +20,18 @@ class AnimeUnityAPI(BaseStreamingAPI):
     
     def _load_config(self):
         """Load site configuration."""
+        from StreamingCommunity.Util.config_json import config_manager
+
         self.base_url = (config_manager.get_site("animeunity", "full_url") or "").rstrip("/")
     
     def _get_search_fn(self):
         """Lazy load the search function."""
         if self._search_fn is None:
-            module = importlib.import_module("StreamingCommunity.Api.Site.animeunity")
-            self._search_fn = getattr(module, "search")
+            module_name = "StreamingCommunity.Api.Site.animeunity"
+            module = sys.modules.get(module_name)
+            if module is None:
+                module = importlib.import_module(module_name)
+            self._search_fn = module.__dict__["search"]
         return self._search_fn
     
     def search(self, query: str) -> List[MediaItem]:
@@ -50,7 +51,10 @@ class AnimeUnityAPI(BaseStreamingAPI):
             results = []
             if database and hasattr(database, 'media_list'):
                 for element in database.media_list:
-                    item_dict = element.__dict__.copy() if hasattr(element, '__dict__') else {}
+                    try:
+                        item_dict = element.__dict__
+                    except AttributeError:
+                        item_dict = element if isinstance(element, dict) else {}
                     
                     media_item = MediaItem(
                         id=item_dict.get('id'),
@@ -83,6 +87,8 @@ class AnimeUnityAPI(BaseStreamingAPI):
         if media_item.is_movie:
             return None
         
+        from StreamingCommunity.Api.Site.animeunity.util.ScrapeSerie import ScrapeSerieAnime
+
         try:
             scraper = ScrapeSerieAnime(self.base_url)
             scraper.setup(series_name=media_item.slug, media_id=media_item.id)
@@ -92,14 +98,10 @@ class AnimeUnityAPI(BaseStreamingAPI):
                 return None
             
             # AnimeUnity typically has single season
-            episodes = []
-            for ep_num in range(1, episodes_count + 1):
-                episode = Episode(
-                    number=ep_num,
-                    name=f"Episodio {ep_num}",
-                    id=ep_num
-                )
-                episodes.append(episode)
+            episodes = [
+                Episode(number=ep_num, name=f"Episodio {ep_num}", id=ep_num)
+                for ep_num in range(1, episodes_count + 1)
+            ]
             
             season = Season(number=1, episodes=episodes)
             return [season]
@@ -122,8 +124,8 @@ class AnimeUnityAPI(BaseStreamingAPI):
         try:
             search_fn = self._get_search_fn()
             
-            # Prepare direct_item from MediaItem
-            direct_item = media_item.raw_data or media_item.to_dict()
+            # Prepare direct_item from MediaItem (raw_data is shared with the search result, copy it here)
+            direct_item = dict(media_item.raw_data) if media_item.raw_data else media_item.to_dict()
             
             # For AnimeUnity, we only use episode selection
             selections = None
@@ -1,12 +1,20 @@
 # 06-06-2025 By @FrancescoGrazioso -> "https://github.com/FrancescoGrazioso"
 
 
+import sys
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 from dataclasses import dataclass
 
 
-@dataclass
+# slots=True is only available from Python 3.10
+_DATACLASS_OPTIONS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Media types handled as single-file downloads
+_MOVIE_TYPES = frozenset({'film', 'movie', 'ova'})
+
+
+@dataclass(**_DATACLASS_OPTIONS)
 class MediaItem:
     """Standardized media item representation."""
     id: Any
@@ -21,7 +29,8 @@ class MediaItem:
     
     @property
     def is_movie(self) -> bool:
-        return self.type.lower() in ['film', 'movie', 'ova']
+        # type keeps the site's original casing, site cores compare against it (e.g. 'Movie')
+        return bool(self.type) and self.type.lower() in _MOVIE_TYPES
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -36,9 +45,23 @@ class MediaItem:
             'raw_data': self.raw_data,
             'is_movie': self.is_movie
         }
+    
+    def to_payload(self) -> Dict[str, Any]:
+        """Same fields as to_dict() without raw_data (used for form payloads)."""
+        return {
+            'id': self.id,
+            'title': self.title,
+            'slug': self.slug,
+            'type': self.type,
+            'url': self.url,
+            'poster': self.poster,
+            'release_date': self.release_date,
+            'year': self.year,
+            'is_movie': self.is_movie
+        }
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Episode:
     """Episode information."""
     number: int
@@ -53,7 +76,7 @@ class Episode:
         }
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Season:
     """Season information."""
     number: int
@@ -1,7 +1,9 @@
 # 06-06-2025 By @FrancescoGrazioso -> "https://github.com/FrancescoGrazioso"
 
 
+import sys
 import importlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Optional
 
 
@@ -9,11 +11,6 @@ from typing import List, Optional
 from .base import BaseStreamingAPI, MediaItem, Season, Episode
 
 
-# External utilities
-from StreamingCommunity.Util.config_json import config_manager
-from StreamingCommunity.Api.Site.streamingcommunity.util.ScrapeSerie import GetSerieInfo
-
-
 class StreamingCommunityAPI(BaseStreamingAPI):
     def __init__(self):
         super().__init__()
@@ -23,13 +20,18 @@ class StreamingCommunityAPI(BaseStreamingAPI):
     
     def _load_config(self):
         """Load site configuration."""
+        from StreamingCommunity.Util.config_json import config_manager
+
         self.base_url = config_manager.get_site("streamingcommunity", "full_url").rstrip("/") + "/it"
     
     def _get_search_fn(self):
         """Lazy load the search function."""
         if self._search_fn is None:
-            module = importlib.import_module("StreamingCommunity.Api.Site.streamingcommunity")
-            self._search_fn = getattr(module, "search")
+            module_name = "StreamingCommunity.Api.Site.streamingcommunity"
+            module = sys.modules.get(module_name)
+            if module is None:
+                module = importlib.import_module(module_name)
+            self._search_fn = module.__dict__["search"]
         return self._search_fn
     
     def search(self, query: str) -> List[MediaItem]:
@@ -49,7 +51,10 @@ class StreamingCommunityAPI(BaseStreamingAPI):
             results = []
             if database and hasattr(database, 'media_list'):
                 for element in database.media_list:
-                    item_dict = element.__dict__.copy() if hasattr(element, '__dict__') else {}
+                    try:
+                        item_dict = element.__dict__
+                    except AttributeError:
+                        item_dict = element if isinstance(element, dict) else {}
                     
                     media_item = MediaItem(
                         id=item_dict.get('id'),
@@ -81,6 +86,8 @@ class StreamingCommunityAPI(BaseStreamingAPI):
         if media_item.is_movie:
             return None
         
+        from StreamingCommunity.Api.Site.streamingcommunity.util.ScrapeSerie import GetSerieInfo
+
         try:
             scraper = GetSerieInfo(
                 url=self.base_url,
@@ -92,25 +99,31 @@ class StreamingCommunityAPI(BaseStreamingAPI):
             if not seasons_count:
                 return None
             
-            seasons = []
-            for season_num in range(1, seasons_count + 1):
-                try:
-                    episodes_raw = scraper.getEpisodeSeasons(season_num)
-                    episodes = []
-                    
-                    for idx, ep in enumerate(episodes_raw or [], 1):
-                        episode = Episode(
-                            number=idx,
-                            name=getattr(ep, 'name', f"Episodio {idx}"),
-                            id=getattr(ep, 'id', idx)
-                        )
-                        episodes.append(episode)
-                    
-                    season = Season(number=season_num, episodes=episodes)
-                    seasons.append(season)
+            # Seasons are fetched concurrently, each one fills its own Season object in the scraper
+            episodes_by_season = {}
+            with ThreadPoolExecutor(max_workers=min(seasons_count, 8)) as executor:
+                futures = {
+                    executor.submit(scraper.getEpisodeSeasons, season_num): season_num
+                    for season_num in range(1, seasons_count + 1)
+                }
+
+                for future in as_completed(futures):
+                    try:
+                        episodes_by_season[futures[future]] = future.result()
+                    except Exception:
+                        pass
 
-                except Exception:
-                    continue
+            seasons = []
+            for season_num in sorted(episodes_by_season):
+                episodes = [
+                    Episode(
+                        number=idx,
+                        name=getattr(ep, 'name', f"Episodio {idx}"),
+                        id=getattr(ep, 'id', idx)
+                    )
+                    for idx, ep in enumerate(episodes_by_season[season_num] or (), 1)
+                ]
+                seasons.append(Season(number=season_num, episodes=episodes))
             
             return seasons if seasons else None
             
@@ -132,8 +145,8 @@ class StreamingCommunityAPI(BaseStreamingAPI):
         try:
             search_fn = self._get_search_fn()
             
-            # Prepare direct_item from MediaItem
-            direct_item = media_item.raw_data or media_item.to_dict()
+            # Prepare direct_item from MediaItem (raw_data is shared with the search result, copy it here)
+            direct_item = dict(media_item.raw_data) if media_item.raw_data else media_item.to_dict()
             
             # Prepare selections
             selections = None
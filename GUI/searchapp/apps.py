@@ -1,9 +1,38 @@
 # 06-06-2025 By @FrancescoGrazioso -> "https://github.com/FrancescoGrazioso"
 
 
+import os
+import sys
+
+
+# External utilities
 from django.apps import AppConfig
 
 
+def _is_server_process() -> bool:
+    """Return True when running under runserver's worker or a WSGI/ASGI server."""
+    if os.environ.get("RUN_MAIN") == "true":
+        return True
+
+    program = os.path.basename(sys.argv[0]) if sys.argv else ""
+    return any(server in program for server in ("gunicorn", "uwsgi", "uvicorn", "daphne"))
+
+
 class SearchappConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
-    name = "searchapp"
\ No newline at end of file
+    name = "searchapp"
+
+    def ready(self):
+        """Pre-import site backends in server processes so the first request is not slowed down."""
+        if not _is_server_process():
+            return
+
+        # Same module path used by views, so the warmed get_api cache is shared
+        from GUI.searchapp.api import get_api, get_available_sites
+
+        for site in get_available_sites():
+            try:
+                api = get_api(site)
+                api._get_search_fn()
+            except Exception:
+                pass
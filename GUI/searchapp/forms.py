@@ -1,13 +1,20 @@
 # 06-06-2025 By @FrancescoGrazioso -> "https://github.com/FrancescoGrazioso"
 
 
+from functools import lru_cache
+
 from django import forms
-from GUI.searchapp.api import get_available_sites
+from GUI.searchapp.api import get_available_sites, get_registry_version
+
+
+@lru_cache(maxsize=1)
+def _cached_site_choices(registry_version: int):
+    # registry_version only keys the cache, so register_api() invalidates it
+    return tuple((site, site.replace('_', ' ').title()) for site in get_available_sites())
 
 
 def get_site_choices():
-    sites = get_available_sites()
-    return [(site, site.replace('_', ' ').title()) for site in sites]
+    return list(_cached_site_choices(get_registry_version()))
 
 
 class SearchForm(forms.Form):
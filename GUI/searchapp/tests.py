@@ -1,16 +1,22 @@
 # 06-06-2025 By @FrancescoGrazioso -> "https://github.com/FrancescoGrazioso"
 
 
+from django.core.cache import cache
 from django.test import TestCase, Client
 from django.urls import reverse
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 import json
 
+from GUI.searchapp.api.animeunity import AnimeUnityAPI
+from GUI.searchapp.api.base import MediaItem
+from GUI.searchapp.views import _media_item_to_display_dict
+
 
 class SeriesMetadataViewTests(TestCase):
     def setUp(self):
         self.client = Client()
         self.url = reverse("series_metadata")
+        cache.clear()
 
     def post_json(self, data):
         return self.client.post(
@@ -85,4 +91,47 @@ class SeriesMetadataViewTests(TestCase):
         data = resp.json()
         self.assertTrue(data.get("isSeries"))
         self.assertEqual(data.get("seasonsCount"), 1)
-        self.assertEqual(data.get("episodesPerSeason"), {1: 24})
\ No newline at end of file
+        self.assertEqual(data.get("episodesPerSeason"), {1: 24})
+
+    @patch("StreamingCommunity.Api.Site.animeunity.util.ScrapeSerie.ScrapeSerieAnime")
+    @patch(
+        "StreamingCommunity.Util.config_json.config_manager.get_site",
+        return_value="https://example.com",
+    )
+    def test_metadata_cached_per_title(self, _cfg_mock, scrape_mock):
+        instance = scrape_mock.return_value
+        instance.get_count_episodes.return_value = 12
+
+        payload = {"type": "series", "id": 77, "slug": "anime-y"}
+        first = self.post_json({"source_alias": "animeunity", "item_payload": payload})
+        second = self.post_json({"source_alias": "animeunity", "item_payload": payload})
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(scrape_mock.call_count, 1)
+
+        other = {"type": "series", "id": 78, "slug": "anime-z"}
+        resp = self.post_json({"source_alias": "animeunity", "item_payload": other})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(scrape_mock.call_count, 2)
+
+
+class DownloadPayloadTests(TestCase):
+    @patch(
+        "StreamingCommunity.Util.config_json.config_manager.get_site",
+        return_value="https://example.com",
+    )
+    def test_animeunity_movie_keeps_original_type(self, _cfg_mock):
+        item = MediaItem(id=9, title="Film X", slug="film-x", type="Movie")
+        self.assertTrue(item.is_movie)
+
+        # Hidden form payload rendered for the search result
+        payload = json.loads(_media_item_to_display_dict(item, "animeunity")["payload_json"])
+        self.assertEqual(payload["type"], "Movie")
+
+        api = AnimeUnityAPI()
+        search_fn = MagicMock()
+        with patch.object(AnimeUnityAPI, "_get_search_fn", return_value=search_fn):
+            api.start_download(api.ensure_complete_item(payload))
+
+        direct_item = search_fn.call_args.kwargs["direct_item"]
+        self.assertEqual(direct_item["type"], "Movie")
+        self.assertIsNone(search_fn.call_args.kwargs["selections"])
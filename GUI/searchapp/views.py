@@ -2,6 +2,7 @@
 
 
 import json
+import queue
 import threading
 from datetime import datetime
 from typing import Any, Dict
@@ -12,6 +13,12 @@ from django.shortcuts import render, redirect
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
+from django.core.cache import cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 
 # Internal utilities
@@ -20,15 +27,45 @@ from GUI.searchapp.api import get_api
 from GUI.searchapp.api.base import MediaItem
 
 
+# Accepted release date formats, tried in order (the ISO one via fromisoformat)
+_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%Y', '%Y')
+
+# Background downloads run on a few daemon workers instead of one thread per request.
+# Daemon threads keep Ctrl-C and runserver autoreload from waiting on running downloads.
+_DOWNLOAD_WORKERS = 4
+_DOWNLOAD_QUEUE: "queue.Queue" = queue.Queue()
+_download_workers_lock = threading.Lock()
+_download_workers_started = False
+
+# How long (seconds) series metadata is reused server side
+_METADATA_CACHE_TTL = 300
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize obj to compact JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def _loads(data: Any) -> Any:
+    """Parse JSON from str or bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 def _media_item_to_display_dict(item: MediaItem, source_alias: str) -> Dict[str, Any]:
     """Convert MediaItem to template-friendly dictionary."""
+    payload = item.to_payload()
+    is_movie = payload['is_movie']
     result = {
         'display_title': item.title,
         'display_type': item.type.capitalize(),
         'source': source_alias.capitalize(),
         'source_alias': source_alias,
         'bg_image_url': item.poster,
-        'is_movie': item.is_movie,
+        'is_movie': is_movie,
     }
     
     # Format release date
@@ -36,28 +73,26 @@ def _media_item_to_display_dict(item: MediaItem, source_alias: str) -> Dict[str,
     if item.year:
         display_release = str(item.year)
     elif item.release_date:
+        release_date = str(item.release_date)[:10]
         try:
-            for fmt in ('%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d', '%d-%m-%Y', '%Y'):
-                try:
-                    parsed_date = datetime.strptime(str(item.release_date)[:10], fmt)
-                    display_release = str(parsed_date.year)
-                    break
-
-                except Exception:
-                    continue
+            # Fast path for ISO dates, which is what most sites return
+            display_release = str(datetime.fromisoformat(release_date).year)
 
-            if not display_release:
+        except ValueError:
+            for fmt in _DATE_FORMATS[1:]:
                 try:
-                    display_release = str(int(str(item.release_date)[:4]))
+                    display_release = str(datetime.strptime(release_date, fmt).year)
+                    break
 
-                except Exception:
-                    display_release = str(item.release_date)
+                except ValueError:
+                    pass
 
-        except Exception:
-            pass
+            else:
+                year_prefix = release_date[:4]
+                display_release = year_prefix if year_prefix.isdigit() else str(item.release_date)
     
     result['display_release'] = display_release
-    result['payload_json'] = json.dumps(item.to_dict())
+    result['payload_json'] = _dumps(payload)
     
     return result
 
@@ -77,8 +112,9 @@ def search(request: HttpRequest) -> HttpResponse:
         messages.error(request, "Dati non validi")
         return render(request, "searchapp/home.html", {"form": form})
 
-    site = form.cleaned_data["site"]
-    query = form.cleaned_data["query"]
+    cleaned_data = form.cleaned_data
+    site = cleaned_data["site"]
+    query = cleaned_data["query"]
 
     try:
         api = get_api(site)
@@ -100,8 +136,31 @@ def search(request: HttpRequest) -> HttpResponse:
     )
 
 
+def _download_worker() -> None:
+    """Run queued download tasks forever."""
+    while True:
+        task = _DOWNLOAD_QUEUE.get()
+        try:
+            task()
+        finally:
+            _DOWNLOAD_QUEUE.task_done()
+
+
+def _ensure_download_workers() -> None:
+    """Start the daemon download workers on first use."""
+    global _download_workers_started
+    if _download_workers_started:
+        return
+
+    with _download_workers_lock:
+        if not _download_workers_started:
+            for index in range(_DOWNLOAD_WORKERS):
+                threading.Thread(target=_download_worker, name=f"dl_{index}", daemon=True).start()
+            _download_workers_started = True
+
+
 def _run_download_in_thread(site: str, item_payload: Dict[str, Any], season: str = None, episodes: str = None) -> None:
-    """Run download in background thread."""
+    """Queue download on the background download pool."""
     def _task():
         try:
             api = get_api(site)
@@ -114,7 +173,8 @@ def _run_download_in_thread(site: str, item_payload: Dict[str, Any], season: str
         except Exception:
             pass
 
-    threading.Thread(target=_task, daemon=True).start()
+    _ensure_download_workers()
+    _DOWNLOAD_QUEUE.put(_task)
 
 
 @require_http_methods(["POST"])
@@ -125,14 +185,16 @@ def series_metadata(request: HttpRequest) -> JsonResponse:
     """
     try:
         # Parse request
-        if request.content_type and "application/json" in request.content_type:
-            body = json.loads(request.body.decode("utf-8"))
+        content_type = request.content_type
+        is_json = bool(content_type) and "application/json" in content_type
+        if is_json:
+            body = _loads(request.body)
             source_alias = body.get("source_alias") or body.get("site")
             item_payload = body.get("item_payload") or {}
         else:
             source_alias = request.POST.get("source_alias") or request.POST.get("site")
             item_payload_raw = request.POST.get("item_payload")
-            item_payload = json.loads(item_payload_raw) if item_payload_raw else {}
+            item_payload = _loads(item_payload_raw) if item_payload_raw else {}
 
         if not source_alias or not item_payload:
             return JsonResponse({"error": "Parametri mancanti"}, status=400)
@@ -151,6 +213,14 @@ def series_metadata(request: HttpRequest) -> JsonResponse:
                 "episodesPerSeason": {}
             })
         
+        # Reuse metadata computed for the same title recently
+        cache_key = None
+        if media_item.id is not None:
+            cache_key = f"series_metadata:{api.site_name}:{media_item.id}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return JsonResponse(cached)
+
         # Get series metadata
         seasons = api.get_series_metadata(media_item)
         
@@ -167,11 +237,15 @@ def series_metadata(request: HttpRequest) -> JsonResponse:
             for season in seasons
         }
         
-        return JsonResponse({
+        data = {
             "isSeries": True,
             "seasonsCount": len(seasons),
             "episodesPerSeason": episodes_per_season
-        })
+        }
+        if cache_key is not None:
+            cache.set(cache_key, data, _METADATA_CACHE_TTL)
+
+        return JsonResponse(data)
         
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
@@ -185,10 +259,11 @@ def start_download(request: HttpRequest) -> HttpResponse:
         messages.error(request, "Dati non validi")
         return redirect("search_home")
 
-    source_alias = form.cleaned_data["source_alias"]
-    item_payload_raw = form.cleaned_data["item_payload"]
-    season = form.cleaned_data.get("season") or None
-    episode = form.cleaned_data.get("episode") or None
+    cleaned_data = form.cleaned_data
+    source_alias = cleaned_data["source_alias"]
+    item_payload_raw = cleaned_data["item_payload"]
+    season = cleaned_data.get("season") or None
+    episode = cleaned_data.get("episode") or None
 
     # Normalize
     if season:
@@ -203,11 +278,12 @@ def start_download(request: HttpRequest) -> HttpResponse:
         return redirect("search_home")
 
     # Extract title for message
-    title = item_payload.get("title")
+    payload_get = item_payload.get
+    title = payload_get("title")
 
     # For animeunity, default to all episodes if not specified and not a movie
-    site = source_alias.split("_")[0].lower()
-    media_type = (item_payload.get("type") or "").lower()
+    site = source_alias.partition("_")[0].lower()
+    media_type = (payload_get("type") or "").lower()
     
     if site == "animeunity" and not episode and media_type not in ("film", "movie", "ova"):
         episode = "*"
@@ -238,8 +314,9 @@ def start_download(request: HttpRequest) -> HttpResponse:
 def series_detail(request: HttpRequest) -> HttpResponse:
     """Display series details page with seasons and episodes."""
     if request.method == "GET":
-        source_alias = request.GET.get("source_alias")
-        item_payload_raw = request.GET.get("item_payload")
+        query_get = request.GET.get
+        source_alias = query_get("source_alias")
+        item_payload_raw = query_get("item_payload")
         
         if not source_alias or not item_payload_raw:
             messages.error(request, "Parametri mancanti per visualizzare i dettagli della serie.")
@@ -271,7 +348,7 @@ def series_detail(request: HttpRequest) -> HttpResponse:
             context = {
                 "title": media_item.title,
                 "source_alias": source_alias,
-                "item_payload": json.dumps(media_item.to_dict()),
+                "item_payload": _dumps(media_item.to_dict()),
                 "seasons": seasons_data,
                 "bg_image_url": media_item.poster,
             }
@@ -284,11 +361,12 @@ def series_detail(request: HttpRequest) -> HttpResponse:
     
     # POST: download season or selected episodes
     elif request.method == "POST":
-        source_alias = request.POST.get("source_alias")
-        item_payload_raw = request.POST.get("item_payload")
-        season_number = request.POST.get("season_number")
-        download_type = request.POST.get("download_type")
-        selected_episodes = request.POST.get("selected_episodes", "")
+        post_get = request.POST.get
+        source_alias = post_get("source_alias")
+        item_payload_raw = post_get("item_payload")
+        season_number = post_get("season_number")
+        download_type = post_get("download_type")
+        selected_episodes = post_get("selected_episodes", "")
         
         if not all([source_alias, item_payload_raw, season_number]):
             messages.error(request, "Parametri mancanti per il download.")
@@ -1,6 +1,12 @@
 # 25.07.25
 
 import base64
+import codecs
+import json
+import asyncio
+import logging
+import threading
+from typing import Tuple
 from urllib.parse import urlencode
 
 
@@ -12,11 +18,153 @@ from pywidevine.device import Device
 from pywidevine.pssh import PSSH
 
 
+# Internal utilities
+from .http2_client import create_h2_session, fetch_license
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
 # Variable
-console = Console()
+_console = None
+_session_local = threading.local()
+_CDM_CACHE = {}
+_CDM_CACHE_LOCK = threading.Lock()
+
+
+def _get_console() -> Console:
+    """Create the rich console on first use, so import-time and error paths stay cheap."""
+    global _console
+    if _console is None:
+        _console = Console()
+    return _console
+
+
+def _get_license_session() -> requests.Session:
+    """Return this thread's license session, reusing its connection and TLS state across calls."""
+    session = getattr(_session_local, 'session', None)
+    if session is None:
+        session = requests.Session(impersonate="chrome124")
+        _session_local.session = session
+    return session
+
+
+def _loads(data: bytes):
+    """Parse a JSON body, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _strip_json_prefix(body: bytes) -> bytes:
+    """Drop leading whitespace and a UTF-8 BOM, which orjson rejects."""
+    body = body.lstrip()
+    if body.startswith(codecs.BOM_UTF8):
+        body = body[len(codecs.BOM_UTF8):].lstrip()
+    return body
+
+
+def _key_hex(value) -> str:
+    """Return a KID/KEY as unhyphenated lowercase hex (bytes.hex() needs no cleanup)."""
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value).replace('-', '').lower()
+
+
+def _get_cdm(cdm_device_path: str) -> Tuple[Cdm, threading.BoundedSemaphore]:
+    """
+    Return the Cdm for a device file, loading the .wvd and its RSA key only once per path,
+    with the semaphore every caller must hold while a session is open on it.
+    """
+    entry = _CDM_CACHE.get(cdm_device_path)
+    if entry is None:
+        with _CDM_CACHE_LOCK:
+            entry = _CDM_CACHE.get(cdm_device_path)
+            if entry is None:
+                cdm = Cdm.from_device(Device.load(cdm_device_path))
+
+                # pywidevine caps the number of sessions open at once on a Cdm
+                sessions = threading.BoundedSemaphore(getattr(Cdm, 'MAX_NUM_OF_SESSIONS', 16))
+                entry = _CDM_CACHE[cdm_device_path] = (cdm, sessions)
+    return entry
+
+
+async def _acquire_async(semaphore: threading.BoundedSemaphore) -> None:
+    """Acquire a threading semaphore without blocking the event loop."""
+    while not semaphore.acquire(blocking=False):
+        await asyncio.sleep(0.05)
+
+
+def _build_license_request(license_url, headers=None, query_params=None):
+    """Return (request_url, headers) for a license POST, defaulting Content-Type to octet-stream."""
+    # Build request URL with query params
+    request_url = license_url
+    if query_params:
+        request_url = f"{license_url}?{urlencode(query_params)}"
+
+    # Prepare headers (use original headers from fetch)
+    req_headers = headers.copy() if headers else {}
+
+    # Keep original Content-Type or default to octet-stream
+    if 'Content-Type' not in req_headers:
+        req_headers['Content-Type'] = 'application/octet-stream'
+
+    return request_url, req_headers
+
+
+def _extract_content_keys(cdm, session_id, response, license_url, req_headers, pssh):
+    """Parse a license response into the session and return its CONTENT keys, or None if error."""
+    if response.status_code != 200:
+        logging.error("License error: %s %s", response.status_code, response.text[:200])
+        logging.error("License request: url=%s headers=%s session_id=%s pssh=%s", license_url, req_headers, session_id.hex(), pssh)
+        return None
+
+    # Parse license response
+    license_bytes = response.content
+
+    # Handle JSON-wrapped license: first-byte check as fast path, Content-Type for padded/BOM bodies
+    if license_bytes[:1] in (b'{', b'[') or "json" in response.headers.get("Content-Type", ""):
+        try:
+            data = _loads(_strip_json_prefix(license_bytes))
+            if "license" in data:
+                license_bytes = base64.b64decode(data["license"])
+            else:
+                logging.error("'license' field not found in JSON response: %s", data)
+                return None
+        except Exception as e:
+            logging.error("Error parsing JSON license: %s", e)
+            return None
+
+    if not license_bytes:
+        logging.error("License data is empty.")
+        return None
+
+    # Parse license
+    try:
+        cdm.parse_license(session_id, license_bytes)
+    except Exception as e:
+        logging.error("Error parsing license: %s", e)
+        return None
+
+    # Extract CONTENT keys
+    content_keys = []
+    for key in cdm.get_keys(session_id):
+        if key.type == "CONTENT":
+            content_keys.append({
+                'kid': _key_hex(key.kid),
+                'key': _key_hex(key.key)
+            })
+
+    if not content_keys:
+        _get_console().print("[bold yellow]⚠️ No CONTENT keys found in license.[/bold yellow]")
+        return None
+
+    return content_keys
 
 
-def get_widevine_keys(pssh, license_url, cdm_device_path, headers=None, query_params=None):
+def get_widevine_keys(pssh, license_url, cdm_device_path, headers=None, query_params=None, session=None):
     """
     Extract Widevine CONTENT keys (KID/KEY) from a license using pywidevine.
 
@@ -26,104 +174,106 @@ def get_widevine_keys(pssh, license_url, cdm_device_path, headers=None, query_pa
         cdm_device_path (str): Path to CDM file (device.wvd).
         headers (dict): Optional HTTP headers for the license request (from fetch).
         query_params (dict): Optional query parameters to append to the URL.
+        session (requests.Session): Optional curl_cffi session to send the request with.
 
     Returns:
         list: List of dicts {'kid': ..., 'key': ...} (only CONTENT keys) or None if error.
     """
     if not cdm_device_path:
-        console.print("[bold red]Invalid CDM device path.[/bold red]")
+        logging.error("Invalid CDM device path.")
         return None
 
     try:
-        device = Device.load(cdm_device_path)
-        cdm = Cdm.from_device(device)
-        session_id = cdm.open()
+        cdm, sessions = _get_cdm(cdm_device_path)
 
-        try:
-            challenge = cdm.get_license_challenge(session_id, PSSH(pssh))
-            
-            # Build request URL with query params
-            request_url = license_url
-            if query_params:
-                request_url = f"{license_url}?{urlencode(query_params)}"
-
-            # Prepare headers (use original headers from fetch)
-            req_headers = headers.copy() if headers else {}
-            request_kwargs = {}
-            request_kwargs['data'] = challenge
-
-            # Keep original Content-Type or default to octet-stream
-            if 'Content-Type' not in req_headers:
-                req_headers['Content-Type'] = 'application/octet-stream'
-
-            # Send license request
-            try:
-                # response = httpx.post(license_url, data=challenge, headers=req_headers, content=payload)
-                response = requests.post(request_url, headers=req_headers, impersonate="chrome124", **request_kwargs)
-
-            except Exception as e:
-                console.print(f"[bold red]Request error:[/bold red] {e}")
-                return None
+        # Hold one of the Cdm's session slots, shared with every other caller of this device
+        with sessions:
+            session_id = cdm.open()
 
-            if response.status_code != 200:
-                console.print(f"[bold red]License error:[/bold red] {response.status_code}, {response.text}")
-                console.print({
-                    "url": license_url,
-                    "headers": req_headers,
-                    "session_id": session_id.hex(),
-                    "pssh": pssh
-                })
-                return None
-
-            # Parse license response
-            license_bytes = response.content
-            content_type = response.headers.get("Content-Type", "")
+            try:
+                challenge = cdm.get_license_challenge(session_id, PSSH(pssh))
+                request_url, req_headers = _build_license_request(license_url, headers, query_params)
 
-            # Handle JSON response
-            if "application/json" in content_type:
+                # Send license request
                 try:
-                    data = response.json()
-                    if "license" in data:
-                        license_bytes = base64.b64decode(data["license"])
-                    else:
-                        console.print(f"[bold red]'license' field not found in JSON response: {data}.[/bold red]")
-                        return None
+                    # response = httpx.post(license_url, data=challenge, headers=req_headers, content=payload)
+                    response = (session or _get_license_session()).post(request_url, headers=req_headers, data=challenge)
+
                 except Exception as e:
-                    console.print(f"[bold red]Error parsing JSON license:[/bold red] {e}")
+                    logging.error("License request error: %s", e)
                     return None
 
-            if not license_bytes:
-                console.print("[bold red]License data is empty.[/bold red]")
-                return None
+                return _extract_content_keys(cdm, session_id, response, license_url, req_headers, pssh)
+        
+            finally:
+                cdm.close(session_id)
 
-            # Parse license
+    except Exception as e:
+        logging.error("CDM error: %s", e)
+        return None
+
+
+async def get_widevine_keys_batch(psshs, license_url, cdm_device_path, headers=None, query_params=None, session=None):
+    """
+    Fetch Widevine CONTENT keys for several PSSHs concurrently against the same license server.
+
+    Args:
+        psshs (list): PSSH base64 strings, one license request each.
+        license_url (str): Widevine license URL.
+        cdm_device_path (str): Path to CDM file (device.wvd).
+        headers (dict): Optional HTTP headers for the license requests (from fetch).
+        query_params (dict): Optional query parameters to append to the URL.
+        session (requests.AsyncSession): Optional session, e.g. one also used for the MPD fetch.
+            Without one, a scoped HTTP/2 session is opened for the batch and closed afterwards.
+
+    Returns:
+        list: One entry per PSSH, in order: list of {'kid': ..., 'key': ...} dicts or None if error.
+    """
+    if not cdm_device_path:
+        logging.error("Invalid CDM device path.")
+        return [None] * len(psshs)
+
+    try:
+        cdm, sessions = _get_cdm(cdm_device_path)
+    except Exception as e:
+        logging.error("CDM error: %s", e)
+        return [None] * len(psshs)
+
+    request_url, req_headers = _build_license_request(license_url, headers, query_params)
+
+    async def _fetch_keys(pssh):
+        # The session slots are shared with every other caller of this device
+        await _acquire_async(sessions)
+        try:
             try:
-                cdm.parse_license(session_id, license_bytes)
+                session_id = cdm.open()
             except Exception as e:
-                console.print(f"[bold red]Error parsing license:[/bold red] {e}")
+                logging.error("CDM error: %s", e)
                 return None
 
-            # Extract CONTENT keys
-            content_keys = []
-            for key in cdm.get_keys(session_id):
-                if key.type == "CONTENT":
-                    kid = key.kid.hex() if isinstance(key.kid, bytes) else str(key.kid)
-                    key_val = key.key.hex() if isinstance(key.key, bytes) else str(key.key)
+            try:
+                challenge = cdm.get_license_challenge(session_id, PSSH(pssh))
+
+                try:
+                    response = await fetch_license(request_url, req_headers, challenge, session)
+                except Exception as e:
+                    logging.error("License request error: %s", e)
+                    return None
 
-                    content_keys.append({
-                        'kid': kid.replace('-', '').strip(),
-                        'key': key_val.replace('-', '').strip()
-                    })
+                return _extract_content_keys(cdm, session_id, response, license_url, req_headers, pssh)
 
-            if not content_keys:
-                console.print("[bold yellow]⚠️ No CONTENT keys found in license.[/bold yellow]")
+            except Exception as e:
+                logging.error("CDM error: %s", e)
                 return None
 
-            return content_keys
-        
+            finally:
+                cdm.close(session_id)
+
         finally:
-            cdm.close(session_id)
+            sessions.release()
 
-    except Exception as e:
-        console.print(f"[bold red]CDM error:[/bold red] {e}")
-        return None
\ No newline at end of file
+    if session is not None:
+        return list(await asyncio.gather(*(_fetch_keys(pssh) for pssh in psshs)))
+
+    async with create_h2_session() as session:
+        return list(await asyncio.gather(*(_fetch_keys(pssh) for pssh in psshs)))
@@ -0,0 +1,44 @@
+# 14.10.26
+
+from typing import Dict, Optional
+
+
+# External library
+from curl_cffi import requests
+from curl_cffi import CurlHttpVersion
+
+
+# Internal utilities
+from StreamingCommunity.Util.config_json import config_manager
+
+
+# Variable
+max_timeout = config_manager.get_int('REQUESTS', 'timeout')
+
+
+def create_h2_session() -> requests.AsyncSession:
+    """
+    Create an HTTP/2 AsyncSession for MPD and license requests, to be used as `async with`.
+    Passing the same session to several fetches multiplexes them on one connection per host.
+    """
+    return requests.AsyncSession(impersonate="chrome124", http_version=CurlHttpVersion.V2_0)
+
+
+async def fetch_mpd(url: str, headers: Optional[Dict[str, str]] = None, session: Optional[requests.AsyncSession] = None) -> bytes:
+    """Fetch an MPD manifest and return its raw body (a scoped session is used if none is given)."""
+    if session is None:
+        async with create_h2_session() as scoped:
+            return await fetch_mpd(url, headers, scoped)
+
+    response = await session.get(url, headers=headers, timeout=max_timeout)
+    response.raise_for_status()
+    return response.content
+
+
+async def fetch_license(url: str, headers: Optional[Dict[str, str]], data: bytes, session: Optional[requests.AsyncSession] = None):
+    """POST a license challenge and return the response (status is checked by the caller)."""
+    if session is None:
+        async with create_h2_session() as scoped:
+            return await fetch_license(url, headers, data, scoped)
+
+    return await session.post(url, headers=headers, data=data, timeout=max_timeout)
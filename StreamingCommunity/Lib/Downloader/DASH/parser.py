@@ -1,25 +1,191 @@
 # 25.07.25
 
+import os
 import re
+import base64
+import binascii
+import time
+import pickle
+import hashlib
+import random
 import logging
+import threading
+from functools import lru_cache
+from operator import itemgetter
 from urllib.parse import urljoin
-import xml.etree.ElementTree as ET
-from typing import List, Dict, Optional, Tuple, Any
+from email.utils import parsedate_to_datetime
+from typing import Callable, List, Dict, Optional, Sequence, Tuple, Any
 
 
 # External library
+from lxml import etree
 from curl_cffi import requests
-from rich.console import Console
 
 
 # Internal utilities
 from StreamingCommunity.Util.config_json import config_manager
+from .http2_client import fetch_mpd
 
 
 # Variable
-console = Console()
 max_timeout = config_manager.get_int('REQUESTS', 'timeout')
 max_retry = config_manager.get_int('REQUESTS', 'max_retry')
+CENC_NAMESPACE = 'urn:mpeg:cenc:2013'
+WIDEVINE_SYSTEM_ID = 'edef8ba9-79d6-4ace-a3c8-27dcd51d21ed'
+WIDEVINE_SYSTEM_ID_BYTES = bytes.fromhex(WIDEVINE_SYSTEM_ID.replace('-', ''))
+_NUMBER_RE = re.compile(r'\$Number(?:%0(\d+)d)?\$')
+_NUMBER_SENTINEL = 918273645546372819
+_MPD_TAG_NAMES = ('Period', 'AdaptationSet', 'Representation', 'SegmentTemplate', 'SegmentTimeline', 'S', 'BaseURL', 'ContentProtection')
+_session_local = threading.local()
+# Relative paths that may need urljoin normalization (scheme, params, query/fragment, dot or empty segments, control chars)
+_NON_TRIVIAL_REL_RE = re.compile(r'^[/.]|[\x00-\x20:;?#\\]|//|/\.')
+_VIDEO_KEY = itemgetter('height', 'width', 'bandwidth')
+_AUDIO_KEY = itemgetter('bandwidth')
+
+RETRY_AFTER_CAP = 30
+MPD_CACHE_ENABLED = config_manager.get_bool('M3U8_DOWNLOAD', 'cache_mpd', default=True)
+MPD_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'streamingcommunity', 'mpd')
+MPD_CACHE_VERSION = 1               # Bump when the pickled representation layout changes
+MPD_CACHE_MAX_AGE = 7 * 24 * 3600   # Seconds an unused entry is kept
+MPD_CACHE_MAX_ENTRIES = 100
+MPD_CHUNK_SIZE = 64 * 1024
+
+# Parser options: large manifests allowed, entities and network access disabled
+_XML_PARSER_OPTIONS = dict(huge_tree=True, remove_blank_text=True, collect_ids=False, resolve_entities=False, no_network=True)
+
+
+def _get_mpd_session() -> requests.Session:
+    """Return this thread's MPD session, reusing its connection and TLS state across fetches"""
+    session = getattr(_session_local, 'session', None)
+    if session is None:
+        session = requests.Session(impersonate="chrome124")
+        _session_local.session = session
+    return session
+
+
+@lru_cache(maxsize=4096)
+def _cached_urljoin(base: str, url: str) -> str:
+    return urljoin(base, url)
+
+
+@lru_cache(maxsize=256)
+def _is_plain_base(base: str) -> bool:
+    """True if urljoin(base, rel) is plain concatenation for simple relative paths"""
+    return '?' not in base and '#' not in base and urljoin(base, 'x') == base + 'x'
+
+
+def _join_url(base: str, url: str) -> str:
+    """urljoin with a concatenation fast path for simple relative segment paths"""
+    if url and _is_plain_base(base) and not _NON_TRIVIAL_REL_RE.search(url):
+        return base + url
+    return _cached_urljoin(base, url)
+
+
+def _is_widevine_pssh(pssh_b64: str) -> bool:
+    """Return True if the base64 'pssh' box carries the Widevine SystemID (bytes 12-28)"""
+    try:
+        box = base64.b64decode(pssh_b64.strip())
+    except (binascii.Error, ValueError):
+        return False
+    return box[4:8] == b'pssh' and box[12:28] == WIDEVINE_SYSTEM_ID_BYTES
+
+
+def _expand_timeline(entries: Sequence[Tuple[Optional[int], int, int]], total: int, start_number: int) -> Tuple[List[int], List[int]]:
+    """Expand (t, d, count) SegmentTimeline entries into preallocated number/time lists"""
+    number_list = list(range(start_number, start_number + total))
+    time_list = [0] * total
+    current_time = 0
+    pos = 0
+
+    for t, d, count in entries:
+
+        # Handle 't' attribute (explicit time)
+        if t is not None:
+            current_time = t
+
+        end = pos + count
+        time_list[pos:end] = range(current_time, current_time + d * count, d) if d else [current_time] * count
+        current_time += d * count
+        pos = end
+
+    return number_list, time_list
+
+
+def _evict_mpd_cache() -> None:
+    """Drop MPD cache entries unused for MPD_CACHE_MAX_AGE, then the oldest beyond MPD_CACHE_MAX_ENTRIES"""
+    try:
+        entries = []
+        for entry in os.scandir(MPD_CACHE_DIR):
+            if entry.name.endswith('.pkl'):
+                entries.append((entry.stat().st_mtime, entry.path[:-len('.pkl')]))
+    except OSError:
+        return
+
+    entries.sort(reverse=True)
+    cutoff = time.time() - MPD_CACHE_MAX_AGE
+
+    for index, (mtime, base) in enumerate(entries):
+        if index >= MPD_CACHE_MAX_ENTRIES or mtime < cutoff:
+            for path in (base + '.etag', base + '.pkl'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def _parse_retry_after(response) -> Optional[float]:
+    """Return the Retry-After delay in seconds (capped), or None if absent or unparsable"""
+    if response is None:
+        return None
+
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+
+    return min(max(delay, 0.0), RETRY_AFTER_CAP)
+
+
+def _apply_base_url(base: str, base_element) -> str:
+    """Resolve a BaseURL element against the inherited base (absolute BaseURLs replace it)"""
+    if base_element is None or not base_element.text:
+        return base
+
+    base_text = base_element.text.strip()
+    if base_text.startswith('http'):
+        return base_text
+    return urljoin(base, base_text)
+
+
+@lru_cache(maxsize=None)
+def _clark_tags(mpd_namespace: str) -> Dict[str, str]:
+    """Map MPD element names to Clark notation ({uri}Name), so lookups skip prefix resolution"""
+    prefix = '{' + mpd_namespace + '}' if mpd_namespace else ''
+    tags = {name: prefix + name for name in _MPD_TAG_NAMES}
+    tags['pssh'] = '{' + CENC_NAMESPACE + '}pssh'
+    return tags
+
+
+@lru_cache(maxsize=None)
+def _compile_xpaths(mpd_namespace: str) -> Dict[str, etree.XPath]:
+    """Compile the XPath expressions used by MPDParser for a given MPD namespace"""
+    ns = {'mpd': mpd_namespace, 'cenc': CENC_NAMESPACE}
+    return {
+        'periods': etree.XPath('.//mpd:Period', namespaces=ns),
+        'adaptation_sets': etree.XPath('mpd:AdaptationSet', namespaces=ns),
+        'widevine_pssh': etree.XPath(
+            f".//mpd:ContentProtection[contains(translate(@schemeIdUri, 'ABCDEF', 'abcdef'), '{WIDEVINE_SYSTEM_ID}')]/cenc:pssh/text()",
+            namespaces=ns,
+        ),
+        'any_pssh': etree.XPath('.//mpd:ContentProtection/cenc:pssh/text()', namespaces=ns),
+    }
 
 
 
@@ -77,10 +243,7 @@ class URLBuilder:
             return None
 
         # Substitute RepresentationID and Bandwidth first
-        if rep_id is not None:
-            template = template.replace('$RepresentationID$', rep_id)
-        if bandwidth is not None:
-            template = template.replace('$Bandwidth$', str(bandwidth))
+        template = URLBuilder._replace_ids(template, rep_id, bandwidth)
 
         # Handle $Number$ with optional formatting
         template = URLBuilder._replace_number(template, number)
@@ -91,23 +254,71 @@ class URLBuilder:
 
         return URLBuilder._finalize_url(base, template)
 
+    @staticmethod
+    def compile(template: str, rep_id: Optional[str] = None, bandwidth: Optional[int] = None) -> Callable[..., str]:
+        """
+        Pre-compile a media template into a function (number=None, time=None) -> relative URL,
+        giving the same substitutions as build_url without re-parsing the template per segment.
+        """
+        template = URLBuilder._replace_ids(template, rep_id, bandwidth)
+
+        # Escape literal braces, then turn placeholders into str.format fields
+        fmt = template.replace('{', '{{').replace('}', '}}')
+        fmt = _NUMBER_RE.sub(lambda m: '{n:0%sd}' % m.group(1) if m.group(1) else '{n}', fmt)
+        fmt = fmt.replace('$Time$', '{t}')
+        format_fn = fmt.format
+
+        def _build(number: Optional[int] = None, time: Optional[int] = None) -> str:
+            return format_fn(
+                n=number if number is not None else 0,
+                t=time if time is not None else '$Time$'
+            )
+
+        return _build
+
+    @staticmethod
+    def build_number_urls(base: str, template: str, numbers, rep_id: Optional[str] = None, bandwidth: Optional[int] = None) -> List[str]:
+        """
+        Build absolute URLs for a $Number$ template over many segment numbers.
+        The URL is resolved once with a digits-only sentinel and split around it,
+        so each segment only costs a single %-format.
+        """
+        build = URLBuilder.compile(template, rep_id=rep_id, bandwidth=bandwidth)
+        matches = _NUMBER_RE.findall(template)
+        width = int(matches[0]) if len(matches) == 1 and matches[0] else 0
+        sentinel_str = str(_NUMBER_SENTINEL)
+
+        # Digits resolve exactly like a real segment number; the sentinel must appear once, unpadded
+        resolved = None
+        if len(matches) == 1 and width < len(sentinel_str) and sentinel_str not in base + template:
+            resolved = URLBuilder._finalize_url(base, build(number=_NUMBER_SENTINEL))
+
+        if resolved is None or resolved.count(sentinel_str) != 1:
+            return [URLBuilder._finalize_url(base, build(number=n)) for n in numbers]
+
+        prefix, suffix = resolved.split(sentinel_str)
+        number_fmt = prefix.replace('%', '%%') + ('%0' + str(width) + 'd' if width else '%d') + suffix.replace('%', '%%')
+        return [number_fmt % n for n in numbers]
+
+    @staticmethod
+    def _replace_ids(template: str, rep_id: Optional[str], bandwidth: Optional[int]) -> str:
+        """Handle $RepresentationID$ and $Bandwidth$ placeholders"""
+        if rep_id is not None:
+            template = template.replace('$RepresentationID$', rep_id)
+        if bandwidth is not None:
+            template = template.replace('$Bandwidth$', str(bandwidth))
+        return template
+
     @staticmethod
     def _replace_number(template: str, number: Optional[int]) -> str:
         """Handle $Number$ placeholder with formatting"""
+        num = str(number if number is not None else 0)
+
         def _replace_number_match(match):
-            num = number if number is not None else 0
-            fmt = match.group(1)
-
-            if fmt:
-                # fmt like %05d -> convert to python format
-                m = re.match(r'%0(\d+)d', fmt)
-                if m:
-                    width = int(m.group(1))
-                    return str(num).zfill(width)
-                
-            return str(num)
+            width = match.group(1)
+            return num.zfill(int(width)) if width else num
 
-        return re.sub(r'\$Number(\%0\d+d)?\$', _replace_number_match, template)
+        return _NUMBER_RE.sub(_replace_number_match, template)
 
     @staticmethod
     def _finalize_url(base: str, template: str) -> str:
@@ -120,13 +331,13 @@ class URLBuilder:
         
         if '?' in path_and_query:
             path_part, query_part = path_and_query.split('?', 1)
-            abs_path = urljoin(base, path_part)
+            abs_path = _join_url(base, path_part)
 
             # ensure we don't accidentally lose existing query separators
             final = abs_path + '?' + query_part + frag
 
         else:
-            abs_path = urljoin(base, path_and_query)
+            abs_path = _join_url(base, path_and_query)
             final = abs_path + frag
 
         return final
@@ -135,72 +346,56 @@ class URLBuilder:
 class SegmentTimelineParser:
     """Parser for SegmentTimeline elements"""
     
-    def __init__(self, namespace: Dict[str, str]):
+    def __init__(self, namespace: Dict[str, str], tags: Optional[Dict[str, str]] = None):
         self.ns = namespace
+        self.tags = tags or _clark_tags(namespace.get('mpd', ''))
+        self._s_tag = self.tags['S']
 
     def parse(self, seg_timeline_element, start_number: int = 1) -> Tuple[List[int], List[int]]:
         """
         Parse SegmentTimeline and return (number_list, time_list)
         """
-        number_list = []
-        time_list = []
-        
         if seg_timeline_element is None:
-            return number_list, time_list
+            return [], []
 
-        current_time = 0
-        current_number = start_number
-        
-        for s_element in seg_timeline_element.findall('mpd:S', self.ns):
-            d = s_element.get('d')
+        # First pass: read each <S> attribute map once as (t, d, count)
+        entries = []
+        total = 0
+
+        for s_element in seg_timeline_element.iterchildren(self._s_tag):
+            attrib = s_element.attrib
+            d = attrib.get('d')
             if d is None:
                 continue
-                
-            d = int(d)
-            
-            # Handle 't' attribute (explicit time)
-            if s_element.get('t') is not None:
-                current_time = int(s_element.get('t'))
             
             # Get repeat count (default 0 means 1 segment)
-            r = int(s_element.get('r', 0))
-            
+            r = int(attrib.get('r', 0))
+
             # Special case: r=-1 means repeat until end of Period
             if r == -1:
                 r = 0
-            
-            # Add (r+1) segments
-            for i in range(r + 1):
-                number_list.append(current_number)
-                time_list.append(current_time)
-                current_number += 1
-                current_time += d
-                
-        return number_list, time_list
+
+            count = max(r + 1, 0)
+            t = attrib.get('t')
+            entries.append((int(t) if t is not None else None, int(d), count))
+            total += count
+
+        # Second pass: expand entries into number/time lists
+        return _expand_timeline(entries, total, start_number)
 
 
 class RepresentationParser:
     """Parser for individual representations"""
     
-    def __init__(self, mpd_url: str, namespace: Dict[str, str]):
+    def __init__(self, mpd_url: str, namespace: Dict[str, str], tags: Optional[Dict[str, str]] = None):
         self.mpd_url = mpd_url
         self.ns = namespace
-        self.timeline_parser = SegmentTimelineParser(namespace)
+        self.tags = tags or _clark_tags(namespace.get('mpd', ''))
+        self.timeline_parser = SegmentTimelineParser(namespace, self.tags)
 
     def _resolve_adaptation_base_url(self, adapt_set, initial_base: str) -> str:
         """Resolve base URL at AdaptationSet level"""
-        base = initial_base
-        
-        # Check for BaseURL at AdaptationSet level
-        adapt_base = adapt_set.find('mpd:BaseURL', self.ns)
-        if adapt_base is not None and adapt_base.text:
-            base_text = adapt_base.text.strip()
-            if base_text.startswith('http'):
-                base = base_text
-            else:
-                base = urljoin(base, base_text)
-        
-        return base
+        return _apply_base_url(initial_base, adapt_set.find(self.tags['BaseURL']))
 
     def parse_adaptation_set(self, adapt_set, base_url: str) -> List[Dict[str, Any]]:
         """
@@ -211,14 +406,14 @@ class RepresentationParser:
         lang = adapt_set.get('lang', '')
         
         # Find SegmentTemplate at AdaptationSet level
-        adapt_seg_template = adapt_set.find('mpd:SegmentTemplate', self.ns)
+        adapt_seg_template = adapt_set.find(self.tags['SegmentTemplate'])
         
         # Risolvi il BaseURL a livello di AdaptationSet
         adapt_base_url = self._resolve_adaptation_base_url(adapt_set, base_url)
 
-        for rep_element in adapt_set.findall('mpd:Representation', self.ns):
+        for rep_element in adapt_set.findall(self.tags['Representation']):
             representation = self._parse_representation(
-                rep_element, adapt_set, adapt_seg_template, 
+                rep_element, adapt_seg_template, 
                 adapt_base_url,
                 mime_type, lang
             )
@@ -227,7 +422,7 @@ class RepresentationParser:
                 
         return representations
 
-    def _parse_representation(self, rep_element, adapt_set, adapt_seg_template, base_url: str, mime_type: str, lang: str) -> Optional[Dict[str, Any]]:
+    def _parse_representation(self, rep_element, adapt_seg_template, base_url: str, mime_type: str, lang: str) -> Optional[Dict[str, Any]]:
         """Parse a single representation"""
         rep_id = rep_element.get('id')
         bandwidth = rep_element.get('bandwidth')
@@ -237,14 +432,14 @@ class RepresentationParser:
         audio_sampling_rate = rep_element.get('audioSamplingRate')
 
         # Try to find SegmentTemplate at Representation level
-        rep_seg_template = rep_element.find('mpd:SegmentTemplate', self.ns)
+        rep_seg_template = rep_element.find(self.tags['SegmentTemplate'])
         seg_tmpl = rep_seg_template if rep_seg_template is not None else adapt_seg_template
         
         if seg_tmpl is None:
             return None
 
         # Build URLs
-        rep_base_url = self._resolve_base_url(rep_element, adapt_set, base_url)
+        rep_base_url = self._resolve_base_url(rep_element, base_url)
         init_url, media_urls = self._build_segment_urls(seg_tmpl, rep_id, bandwidth, rep_base_url)
 
         # Determine content type first
@@ -282,21 +477,9 @@ class RepresentationParser:
             'segment_urls': media_urls
         }
 
-    def _resolve_base_url(self, rep_element, adapt_set, initial_base: str) -> str:
+    def _resolve_base_url(self, rep_element, initial_base: str) -> str:
         """Resolve base URL at Representation level (AdaptationSet already resolved)"""
-        base = initial_base
-        
-        # Representation-level BaseURL only
-        if rep_element is not None:
-            rep_base = rep_element.find('mpd:BaseURL', self.ns)
-            if rep_base is not None and rep_base.text:
-                base_text = rep_base.text.strip()
-                if base_text.startswith('http'):
-                    base = base_text
-                else:
-                    base = urljoin(base, base_text)
-
-        return base
+        return _apply_base_url(initial_base, rep_element.find(self.tags['BaseURL']))
 
     def _build_segment_urls(self, seg_tmpl, rep_id: str, bandwidth: str, base_url: str) -> Tuple[str, List[str]]:
         """Build initialization and media segment URLs"""
@@ -312,12 +495,12 @@ class RepresentationParser:
         ) if init else None
 
         # Parse segment timeline
-        seg_timeline = seg_tmpl.find('mpd:SegmentTimeline', self.ns)
+        seg_timeline = seg_tmpl.find(self.tags['SegmentTimeline'])
         number_list, time_list = self.timeline_parser.parse(seg_timeline, start_number)
         
         # Fallback solo se non c'è SegmentTimeline
         if not number_list and not time_list:
-            number_list = list(range(start_number, start_number + 100))
+            number_list = range(start_number, start_number + 100)
             time_list = []
 
         # Build media URLs
@@ -325,31 +508,21 @@ class RepresentationParser:
 
         return init_url, media_urls
 
-    def _build_media_urls(self, media_template: str, base_url: str, rep_id: str, bandwidth: str, number_list: List[int], time_list: List[int]) -> List[str]:
+    def _build_media_urls(self, media_template: str, base_url: str, rep_id: str, bandwidth: str, number_list: Sequence[int], time_list: List[int]) -> List[str]:
         """Build list of media segment URLs"""
         if not media_template:
             return []
 
-        media_urls = []
         bandwidth_int = int(bandwidth) if bandwidth else None
+        build = URLBuilder.compile(media_template, rep_id=rep_id, bandwidth=bandwidth_int)
+        finalize = URLBuilder._finalize_url
 
         if '$Time$' in media_template and time_list:
-            for t in time_list:
-                media_urls.append(URLBuilder.build_url(
-                    base_url, media_template, 
-                    rep_id=rep_id, time=t, bandwidth=bandwidth_int
-                ))
+            media_urls = [finalize(base_url, build(time=t)) for t in time_list]
         elif '$Number' in media_template and number_list:
-            for n in number_list:
-                media_urls.append(URLBuilder.build_url(
-                    base_url, media_template, 
-                    rep_id=rep_id, number=n, bandwidth=bandwidth_int
-                ))
+            media_urls = URLBuilder.build_number_urls(base_url, media_template, number_list, rep_id=rep_id, bandwidth=bandwidth_int)
         else:
-            media_urls.append(URLBuilder.build_url(
-                base_url, media_template, 
-                rep_id=rep_id, bandwidth=bandwidth_int
-            ))
+            media_urls = [finalize(base_url, build())]
 
         return media_urls
 
@@ -437,17 +610,32 @@ class MPDParser:
         
         return list(audio_map.values())
 
+    @staticmethod
+    def _split_by_type(representations) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Split representations into (videos, audios, others) in a single pass.
+        """
+        videos, audios, others = [], [], []
+        for rep in representations:
+            rep_type = rep['type']
+            if rep_type == 'video':
+                videos.append(rep)
+            elif rep_type == 'audio':
+                audios.append(rep)
+            else:
+                others.append(rep)
+        return videos, audios, others
+
     @staticmethod
     def get_best(representations):
         """
         Returns the video representation with the highest resolution/bandwidth, or audio with highest bandwidth.
         """
-        videos = [r for r in representations if r['type'] == 'video']
-        audios = [r for r in representations if r['type'] == 'audio']
+        videos, audios, _ = MPDParser._split_by_type(representations)
         if videos:
-            return max(videos, key=lambda r: (r['height'], r['width'], r['bandwidth']))
+            return max(videos, key=_VIDEO_KEY)
         elif audios:
-            return max(audios, key=lambda r: r['bandwidth'])
+            return max(audios, key=_AUDIO_KEY)
         return None
 
     @staticmethod
@@ -455,12 +643,11 @@ class MPDParser:
         """
         Returns the video representation with the lowest resolution/bandwidth, or audio with lowest bandwidth.
         """
-        videos = [r for r in representations if r['type'] == 'video']
-        audios = [r for r in representations if r['type'] == 'audio']
+        videos, audios, _ = MPDParser._split_by_type(representations)
         if videos:
-            return min(videos, key=lambda r: (r['height'], r['width'], r['bandwidth']))
+            return min(videos, key=_VIDEO_KEY)
         elif audios:
-            return min(audios, key=lambda r: r['bandwidth'])
+            return min(audios, key=_AUDIO_KEY)
         return None
 
     @staticmethod
@@ -476,75 +663,227 @@ class MPDParser:
         self.mpd_url = mpd_url
         self.pssh = None
         self.representations = []
+        self._videos = []
+        self._audios = []
         self.ns = {}
         self.root = None
+        self._xpath = {}
+        self.tags = {}
+        self._etag = None
+        self._cache_key = hashlib.sha1(f"{MPD_CACHE_VERSION}:{mpd_url}".encode('utf-8')).hexdigest()
 
-    def parse(self, custom_headers: Dict[str, str]) -> None:
-        """Parse the MPD file and extract all representations"""
-        self._fetch_and_parse_mpd(custom_headers)
+    def parse(self, custom_headers: Dict[str, str], session: Optional[requests.Session] = None) -> None:
+        """
+        Parse the MPD file and extract all representations.
+        An injected curl_cffi session is used for the fetch instead of the per-thread default.
+        """
+        if self._fetch_and_parse_mpd(custom_headers, session):
+            return
+
+        self._parse_root()
+
+        # Live manifests change between requests, only static ones are cached
+        if MPD_CACHE_ENABLED and self.root.get('type') != 'dynamic':
+            self._store_cache()
+
+    async def parse_async(self, custom_headers: Dict[str, str], session: Optional[requests.AsyncSession] = None) -> None:
+        """
+        Fetch the MPD over an AsyncSession and extract all representations.
+        Passing the session also used for the license requests lets both share one HTTP/2 connection.
+        """
+        self.parse_content(await fetch_mpd(self.mpd_url, custom_headers, session))
+
+    def parse_content(self, content: bytes) -> None:
+        """Parse an MPD body that was already fetched by the caller"""
+        self.root = etree.fromstring(content, etree.XMLParser(**_XML_PARSER_OPTIONS))
+        self._parse_root()
+
+    def _parse_root(self) -> None:
+        """Extract namespaces, PSSH and representations from the parsed root element"""
         self._extract_namespace()
         self._extract_pssh()
         self._parse_representations()
         self._deduplicate_representations()
 
-    def _fetch_and_parse_mpd(self, custom_headers: Dict[str, str]) -> None:
-        """Fetch MPD content and parse XML"""
-        response = requests.get(self.mpd_url, headers=custom_headers, timeout=max_timeout, impersonate="chrome124")
-        response.raise_for_status()
-        
-        logging.info(f"Successfully fetched MPD: {response.content}")
-        self.root = ET.fromstring(response.content)
+    def _cache_paths(self) -> Tuple[str, str]:
+        """Return the (etag, pickle) cache file paths for this MPD URL"""
+        base = os.path.join(MPD_CACHE_DIR, self._cache_key)
+        return base + '.etag', base + '.pkl'
+
+    def _load_cached_etag(self) -> Optional[str]:
+        """Return the ETag saved for this MPD URL, or None if there is no cache entry"""
+        if not MPD_CACHE_ENABLED:
+            return None
+
+        etag_path, pkl_path = self._cache_paths()
+        try:
+            with open(etag_path, 'r', encoding='utf-8') as f:
+                etag = f.read().strip()
+        except OSError:
+            return None
+
+        return etag if etag and os.path.exists(pkl_path) else None
+
+    def _load_cached_state(self) -> Optional[tuple]:
+        """Unpickle the parsed state saved for this MPD URL, or None if it is unreadable"""
+        _, pkl_path = self._cache_paths()
+        try:
+            with open(pkl_path, 'rb') as f:
+                state = pickle.load(f)
+
+            # Mark the entry as used so age-based eviction keeps it
+            os.utime(pkl_path)
+            return state
+
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable MPD cache for {self.mpd_url}: {e}")
+            return None
+
+    def _store_cache(self) -> None:
+        """Persist the parsed state with the response ETag so the next run can revalidate it"""
+        if not self._etag:
+            return
+
+        etag_path, pkl_path = self._cache_paths()
+        try:
+            os.makedirs(MPD_CACHE_DIR, exist_ok=True)
+            state = (self.representations, self._videos, self._audios, self.pssh, self.ns)
+
+            # Write the pickle before the ETag so a partial write never validates stale data
+            with open(pkl_path + '.tmp', 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(pkl_path + '.tmp', pkl_path)
+
+            with open(etag_path + '.tmp', 'w', encoding='utf-8') as f:
+                f.write(self._etag)
+            os.replace(etag_path + '.tmp', etag_path)
+
+        except Exception as e:
+            logging.warning(f"Could not write MPD cache for {self.mpd_url}: {e}")
+            return
+
+        _evict_mpd_cache()
+
+    def _restore_cache(self, state: tuple) -> None:
+        """Restore the parsed state saved by _store_cache"""
+        self.representations, self._videos, self._audios, self.pssh, self.ns = state
+        logging.info(f"MPD not modified, using cached parse: {self.mpd_url}")
+
+    def _fetch_and_parse_mpd(self, custom_headers: Dict[str, str], session: Optional[requests.Session] = None) -> bool:
+        """
+        Fetch and parse the MPD, retrying transient failures with exponential backoff.
+        Returns True when the server answered 304 and the cached parse was restored.
+        """
+        attempts = max(max_retry, 1)
+        etag = self._load_cached_etag()
+
+        for attempt in range(attempts):
+            try:
+                return self._fetch_mpd_once(custom_headers, etag, session)
+
+            except requests.exceptions.HTTPError as e:
+                response = getattr(e, 'response', None)
+                status = response.status_code if response is not None else None
+
+                # Client errors other than throttling will not succeed on retry
+                if status is not None and 400 <= status < 500 and status != 429:
+                    raise
+                if attempt + 1 >= attempts:
+                    raise
+                delay = _parse_retry_after(response) if status in (429, 503) else None
+
+            except etree.XMLSyntaxError:
+                # The server answered but the body is not valid XML, fetching it again will not help
+                raise
+
+            except Exception:
+                if attempt + 1 >= attempts:
+                    raise
+                delay = None
+
+            if delay is None:
+                delay = min(2 ** attempt, 8) + random.random() * 0.5
+
+            # The root Logger only shows errors outside debug mode, so tell the user directly why we wait
+            logging.warning(f"MPD fetch failed (attempt {attempt + 1}/{attempts}), retrying in {delay:.1f}s")
+            print(f"MPD fetch failed (attempt {attempt + 1}/{attempts}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _fetch_mpd_once(self, custom_headers: Dict[str, str], etag: Optional[str] = None, session: Optional[requests.Session] = None) -> bool:
+        """Fetch MPD content and parse XML while it is being downloaded"""
+        headers = dict(custom_headers or {})
+        if etag:
+            headers['If-None-Match'] = etag
+
+        response = (session or _get_mpd_session()).get(self.mpd_url, headers=headers, timeout=max_timeout, stream=True)
+        not_modified = bool(etag) and response.status_code == 304
+
+        try:
+            if not not_modified:
+                response.raise_for_status()
+                self._etag = response.headers.get('ETag')
+
+                # Feed parser: each chunk is tokenized as soon as it arrives
+                feed_parser = etree.XMLParser(**_XML_PARSER_OPTIONS)
+                received = 0
+                for chunk in response.iter_content(chunk_size=MPD_CHUNK_SIZE):
+                    if chunk:
+                        feed_parser.feed(chunk)
+                        received += len(chunk)
+
+                self.root = feed_parser.close()
+
+        finally:
+            response.close()
+
+        # Only unpickle the cached parse once the server confirmed it is still current
+        if not_modified:
+            state = self._load_cached_state()
+            if state is not None:
+                self._restore_cache(state)
+                return True
+
+            # Cached state was unusable, fetch the full manifest unconditionally
+            return self._fetch_mpd_once(custom_headers, None, session)
+
+        logging.info(f"Successfully fetched MPD: {self.mpd_url} ({received} bytes)")
+        return False
 
     def _extract_namespace(self) -> None:
         """Extract and register namespaces from the root element"""
         if self.root.tag.startswith('{'):
             uri = self.root.tag[1:].split('}')[0]
             self.ns['mpd'] = uri
-            self.ns['cenc'] = 'urn:mpeg:cenc:2013'
+            self.ns['cenc'] = CENC_NAMESPACE
+            self._xpath = _compile_xpaths(uri)
+            self.tags = _clark_tags(uri)
 
     def _extract_pssh(self) -> None:
         """Extract Widevine PSSH from ContentProtection elements"""
-        # Try to find Widevine PSSH first (preferred)
-        for protection in self.root.findall('.//mpd:ContentProtection', self.ns):
-            scheme_id = protection.get('schemeIdUri', '')
-            
-            # Check if this is Widevine ContentProtection
-            if 'edef8ba9-79d6-4ace-a3c8-27dcd51d21ed' in scheme_id:
-                pssh_element = protection.find('cenc:pssh', self.ns)
-                if pssh_element is not None and pssh_element.text:
-                    self.pssh = pssh_element.text.strip()
-                    return
+        # Try to find Widevine PSSH first (preferred), confirming the box SystemID when present
+        matches = self._xpath['widevine_pssh'](self.root)
+        if matches:
+            self.pssh = next((m for m in matches if _is_widevine_pssh(m)), matches[0]).strip()
+            return
         
-        # Fallback: try any PSSH (for compatibility with other services)
-        for protection in self.root.findall('.//mpd:ContentProtection', self.ns):
-            pssh_element = protection.find('cenc:pssh', self.ns)
-            if pssh_element is not None and pssh_element.text:
-                self.pssh = pssh_element.text.strip()
-                print(f"Found PSSH (fallback): {self.pssh}")
-                return
+        # Fallback: pick a Widevine box from any ContentProtection (multi-DRM manifests)
+        matches = self._xpath['any_pssh'](self.root)
+        if matches:
+            self.pssh = next((m for m in matches if _is_widevine_pssh(m)), matches[0]).strip()
+            print(f"Found PSSH (fallback): {self.pssh}")
 
     def _get_period_base_url(self, period, initial_base: str) -> str:
         """Get base URL at Period level"""
-        base = initial_base
-        
-        period_base = period.find('mpd:BaseURL', self.ns)
-        if period_base is not None and period_base.text:
-            base_text = period_base.text.strip()
-            if base_text.startswith('http'):
-                base = base_text
-            else:
-                base = urljoin(base, base_text)
-        
-        return base
+        return _apply_base_url(initial_base, period.find(self.tags['BaseURL']))
 
     def _parse_representations(self) -> None:
         """Parse all representations from the MPD, filtering out ads and aggregating main content"""
         base_url = self._get_initial_base_url()
-        representation_parser = RepresentationParser(self.mpd_url, self.ns)
+        representation_parser = RepresentationParser(self.mpd_url, self.ns, self.tags)
         
         # Dictionary to aggregate representations by ID
         rep_aggregator = {}
-        periods = self.root.findall('.//mpd:Period', self.ns)
+        periods = self._xpath['periods'](self.root)
 
         for period_idx, period in enumerate(periods):
             period_id = period.get('id', f'period_{period_idx}')
@@ -557,7 +896,7 @@ class MPDParser:
             if is_ad:
                 continue
             
-            for adapt_set in period.findall('mpd:AdaptationSet', self.ns):
+            for adapt_set in self._xpath['adaptation_sets'](period):
                 representations = representation_parser.parse_adaptation_set(adapt_set, period_base_url)
                 
                 for rep in representations:
@@ -581,44 +920,26 @@ class MPDParser:
 
     def _deduplicate_representations(self) -> None:
         """Remove duplicate video and audio representations"""
-        videos = [r for r in self.representations if r['type'] == 'video']
-        audios = [r for r in self.representations if r['type'] == 'audio']
-        others = [r for r in self.representations if r['type'] not in ['video', 'audio']]
+        videos, audios, others = self._split_by_type(self.representations)
         
-        deduplicated_videos = self._deduplicate_videos(videos)
-        deduplicated_audios = self._deduplicate_audios(audios)
-        self.representations = deduplicated_videos + deduplicated_audios + others
+        self._videos = self._deduplicate_videos(videos)
+        self._audios = self._deduplicate_audios(audios)
+        self.representations = self._videos + self._audios + others
 
     def _get_initial_base_url(self) -> str:
         """Get the initial base URL from MPD-level BaseURL"""
         base_url = self.mpd_url.rsplit('/', 1)[0] + '/'
         
         # MPD-level BaseURL
-        mpd_base = self.root.find('mpd:BaseURL', self.ns)
-        if mpd_base is not None and mpd_base.text:
-            base_text = mpd_base.text.strip()
-
-            # Handle BaseURL that might already be absolute
-            if base_text.startswith('http'):
-                base_url = base_text
-            else:
-                base_url = urljoin(base_url, base_text)
-            
-        return base_url
+        return _apply_base_url(base_url, self.root.find(self.tags['BaseURL']))
     
     def get_resolutions(self):
         """Return list of video representations with their resolutions."""
-        return [
-            rep for rep in self.representations
-            if rep['type'] == 'video'
-        ]
+        return self._videos
 
     def get_audios(self):
         """Return list of audio representations."""
-        return [
-            rep for rep in self.representations
-            if rep['type'] == 'audio'
-        ]
+        return self._audios
 
     def get_best_video(self):
         """Return the best video representation (highest resolution, then bandwidth)."""
@@ -627,14 +948,14 @@ class MPDParser:
             return None
         
         # Sort by (height, width, bandwidth)
-        return max(videos, key=lambda r: (r['height'], r['width'], r['bandwidth']))
+        return max(videos, key=_VIDEO_KEY)
 
     def get_best_audio(self):
         """Return the best audio representation (highest bandwidth)."""
         audios = self.get_audios()
         if not audios:
             return None
-        return max(audios, key=lambda r: r['bandwidth'])
+        return max(audios, key=_AUDIO_KEY)
 
     def select_video(self, force_resolution="Best"):
         """